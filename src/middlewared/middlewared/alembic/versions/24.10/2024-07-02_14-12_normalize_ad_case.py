@@ -0,0 +1,27 @@
+"""Normalize case of active directory domain name and nss_info
+
+Revision ID: 3f1c6a9e2b47
+Revises: d8bfbf4e277e
+Create Date: 2024-07-02 14:12:08.271934+00:00
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c6a9e2b47'
+down_revision = 'd8bfbf4e277e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    conn = op.get_bind()
+    conn.execute(
+        "UPDATE directoryservice_activedirectory "
+        "SET ad_domainname = UPPER(ad_domainname), ad_nss_info = UPPER(ad_nss_info)"
+    )
+
+
+def downgrade():
+    pass
@@ -1,34 +1,47 @@
-import json
 import os
 import subprocess
 
+import orjson
+
 from middlewared.plugins.etc import FileShouldNotExist
 from middlewared.plugins.docker.state_utils import IX_APPS_MOUNT_PATH
+from middlewared.utils import MIDDLEWARE_RUN_DIR
+
+
+BASE_CONFIGURATION = {
+    'data-root': os.path.join(IX_APPS_MOUNT_PATH, 'docker'),
+    'exec-opts': ('native.cgroupdriver=cgroupfs',),
+    'iptables': False,
+    'storage-driver': 'overlay2',
+}
+NVIDIA_CONFIG_PATH = '/etc/nvidia-container-runtime/config.toml'
+NVIDIA_RUNTIME_CONFIGURATION = {
+    'runtimes': {'nvidia': {'path': '/usr/bin/nvidia-container-runtime', 'runtimeArgs': []}},
+    'default-runtime': 'nvidia',
+}
+PROXY_STATE_PATH = os.path.join(MIDDLEWARE_RUN_DIR, 'docker-daemon-proxy')
 
 
 def nvidia_configuration():
     # this needs to happen for nvidia gpu to work properly for docker containers
     # https://github.com/NVIDIA/nvidia-docker/issues/854#issuecomment-572175484
-    nvidia_config_path = '/etc/nvidia-container-runtime/config.toml'
-    if not os.path.exists(nvidia_config_path):
-        return {}
-
     # TODO: See if this is even required anymore
     '''
-    with open(nvidia_config_path, 'r') as f:
+    with open(NVIDIA_CONFIG_PATH, 'r') as f:
         data = f.read()
 
-    with open(nvidia_config_path, 'w') as f:
+    with open(NVIDIA_CONFIG_PATH, 'w') as f:
         f.write(data.replace('@/sbin/ldconfig', '/sbin/ldconfig'))
     '''
 
-    return {
-        'runtimes': {'nvidia': {'path': '/usr/bin/nvidia-container-runtime', 'runtimeArgs': []}},
-        'default-runtime': 'nvidia',
-    }
+    return NVIDIA_RUNTIME_CONFIGURATION
 
 
 def gpu_configuration(middleware):
+    if not os.path.exists(NVIDIA_CONFIG_PATH):
+        # Without the nvidia container runtime there is nothing to configure, so don't bother enumerating gpus
+        return {}
+
     available_gpus = middleware.call_sync('device.get_info', {'type': 'GPU'})
     if any(gpu['vendor'] == 'NVIDIA' and gpu['available_to_host'] for gpu in available_gpus):
         return nvidia_configuration()
@@ -36,20 +49,26 @@ def gpu_configuration(middleware):
     return {}
 
 
+def reload_systemd_on_proxy_change():
+    # We need to do this so that proxy changes are respected by systemd on docker daemon start.
+    # daemon-reload is expensive so we only issue it when proxy differs from what was last applied.
+    http_proxy = os.environ.get('http_proxy', '')
+    try:
+        with open(PROXY_STATE_PATH) as f:
+            if f.read() == http_proxy:
+                return
+    except FileNotFoundError:
+        pass
+
+    subprocess.run(['systemctl', 'daemon-reload'], capture_output=True, check=True)
+    with open(PROXY_STATE_PATH, 'w') as f:
+        f.write(http_proxy)
+
+
 def render(service, middleware):
     config = middleware.call_sync('docker.config')
     if not config['pool']:
         raise FileShouldNotExist()
 
-    # We need to do this so that proxy changes are respected by systemd on docker daemon start
-    subprocess.run(['systemctl', 'daemon-reload'], capture_output=True, check=True)
-
-    os.makedirs('/etc/docker', exist_ok=True)
-    data_root = os.path.join(IX_APPS_MOUNT_PATH, 'docker')
-    return json.dumps({
-        'data-root': data_root,
-        'exec-opts': ['native.cgroupdriver=cgroupfs'],
-        'iptables': False,
-        'storage-driver': 'overlay2',
-        **gpu_configuration(middleware),
-    })
+    reload_systemd_on_proxy_change()
+    return orjson.dumps({**BASE_CONFIGURATION, **gpu_configuration(middleware)})
@@ -1,4 +1,4 @@
-from socket import sethostname
+from socket import gethostname, sethostname
 
 from middlewared.service import CallError
 
@@ -6,8 +6,18 @@ from middlewared.service import CallError
 def render(service, middleware):
     hostname = middleware.call_sync("network.configuration.config")['hostname_local']
 
-    with open("/etc/hostname", "w") as f:
-        f.write(hostname)
+    try:
+        with open("/etc/hostname") as f:
+            current = f.read()
+    except FileNotFoundError:
+        current = None
+
+    if current != hostname:
+        with open("/etc/hostname", "w") as f:
+            f.write(hostname)
+
+    if gethostname() == hostname:
+        return
 
     # set the new hostname in kernel
     try:
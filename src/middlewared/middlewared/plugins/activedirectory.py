@@ -1,15 +1,17 @@
-import datetime
+import asyncio
 import enum
 import errno
-import json
 import ipaddress
+import orjson
 import os
+import re
+import time
 import contextlib
 
 from middlewared.plugins.smb import SMBCmd, SMBPath
 from middlewared.plugins.kerberos import krb5ccache
 from middlewared.schema import (
-    accepts, Bool, Dict, Int, IPAddr, LDAP_DN, List, NetbiosName, Ref, returns, Str
+    accepts, Bool, Dict, Int, IPAddr, LDAP_DN, List, NetbiosName, Patch, Ref, returns, Str
 )
 from middlewared.service import job, private, ConfigService, ValidationError, ValidationErrors
 from middlewared.service_exception import CallError, MatchNotFound
@@ -21,21 +23,116 @@ from middlewared.plugins.idmap import DSType
 from middlewared.validators import Range
 
 
+ERRORS_TO_REJOIN = (
+    '0xfffffff6',
+    'LDAP_INVALID_CREDENTIALS',
+    'The name provided is not a properly formed account name',
+    'The attempted logon is invalid.'
+)
+# Matched against raw `net ads` stderr output
+RE_ERRORS_TO_REJOIN = re.compile(b'|'.join(re.escape(err.encode()) for err in ERRORS_TO_REJOIN))
+SMB_CONFIG_CACHE_TTL = 5
+# Common arguments for `net ads` commands authenticated with the system kerberos ticket
+NET_KERBEROS_ARGS = (
+    SMBCmd.NET.value,
+    '--use-kerberos', 'required',
+    '--use-krb5-ccache', krb5ccache.SYSTEM.value,
+)
+# Seconds for which a successful `net ads testjoin` is trusted when restarting the service
+TESTJOIN_TTL = 3600
+INVALID_DNS_UPDATE_ADDRESS_TYPES = (
+    ('is_reserved', 'reserved IP'),
+    ('is_loopback', 'loopback'),
+    ('is_link_local', 'link-local'),
+    ('is_multicast', 'multicast'),
+)
+# Messages for kerberos errors encountered while validating credentials for the
+# initial domain join. Entries are keyed by error code and whether a keytab (True)
+# or a password (False) was used to kinit, and contain the schema key to which the
+# error applies and message.
+KRB5_VALIDATION_ERRORS = {
+    (KRB5ErrCode.KRB5_LIBOS_CANTREADPWD, True): (
+        'kerberos_principal', 'Kerberos keytab is no longer valid.'
+    ),
+    (KRB5ErrCode.KRB5_LIBOS_CANTREADPWD, False): (
+        'bindpw', 'Active Directory account password for user {bindname} is expired.'
+    ),
+    (KRB5ErrCode.KRB5KDC_ERR_CLIENT_REVOKED, True): (
+        'kerberos_principal', 'Active Directory account is locked.'
+    ),
+    (KRB5ErrCode.KRB5KDC_ERR_CLIENT_REVOKED, False): (
+        'bindpw', 'Active Directory account is locked.'
+    ),
+    # When we kinit we try to regenerate keytab if the principal isn't present in it. If we hit
+    # this point it means that user has been tweaking the system-managed keytab in interesting ways.
+    # This error shouldn't occur if we're trying to get ticket with username + password combination.
+    (KRB5ErrCode.KRB5_CC_NOTFOUND, True): (
+        'kerberos_principal',
+        'System keytab lacks an entry for the specified kerberos principal. '
+        'Please select a valid kerberos principal from available choices: {choices}'
+    ),
+    **{(KRB5ErrCode.KRB5KDC_ERR_POLICY, keytab): (
+        'kerberos_principal' if keytab else 'bindpw',
+        'Active Directory security policy rejected request to obtain kerberos ticket. '
+        'This may occur if the bind account has been configured to deny interactive '
+        'logons or require two-factor authentication. Depending on organizational '
+        'security policies, one may be required to pre-generate a kerberos keytab '
+        'and upload to TrueNAS server for use during join process.'
+    ) for keytab in (True, False)},
+    # We're dealing with a missing account
+    **{(KRB5ErrCode.KRB5KDC_ERR_C_PRINCIPAL_UNKNOWN, keytab): (
+        'kerberos_principal' if keytab else 'bindname',
+        'Client\'s credentials were not found on remote domain controller. The most '
+        'common reasons for the domain controller to return this response is due to a '
+        'typo in the service account name or the service or the computer account being '
+        'deleted from Active Directory.'
+    ) for keytab in (True, False)},
+    # Domain permitted clock skew may be more restrictive than our basic
+    # check of no greater than 3 minutes.
+    **{(KRB5ErrCode.KRB5KRB_AP_ERR_SKEW, keytab): (
+        'domainname',
+        'The time offset between the TrueNAS server and the active directory domain '
+        'controller exceeds the maximum value permitted by the Active Directory '
+        'configuration. This may occur if NTP is improperly configured on the '
+        'TrueNAS server or if the hardware clock on the TrueNAS server is configured '
+        'for a local timezone instead of UTC.'
+    ) for keytab in (True, False)},
+    (KRB5ErrCode.KRB5KDC_ERR_PREAUTH_FAILED, True): (
+        'kerberos_principal',
+        'Kerberos principal credentials are no longer valid. Rejoining active directory '
+        'may be required.'
+    ),
+    (KRB5ErrCode.KRB5KDC_ERR_PREAUTH_FAILED, False): (
+        'bindpw', 'Preauthentication failed. This typically indicates an incorrect bind password.'
+    ),
+}
+NETBIOS_KEYS = ('netbiosname', 'netbiosalias')
+FOREIGN_KEYS = frozenset({'netbiosname', 'netbiosname_b', 'netbiosalias', 'bindpw'})
+PERMITTED_KEYS_WHILE_ENABLED = frozenset({
+    'verbose_logging',
+    'use_default_domain',
+    'allow_trusted_doms',
+    'disable_freenas_cache',
+    'restrict_pam',
+    'timeout',
+    'dns_timeout'
+})
+
+
+def write_testjoin_log(errout):
+    with open(f'{SMBPath.LOGDIR.platform()}/domain_testjoin_{int(time.time())}.log', 'wb') as f:
+        f.write(errout)
+
+
 class neterr(enum.Enum):
     JOINED = 1
     NOTJOINED = 2
     FAULT = 3
 
-    def to_status(errstr):
-        errors_to_rejoin = [
-            '0xfffffff6',
-            'LDAP_INVALID_CREDENTIALS',
-            'The name provided is not a properly formed account name',
-            'The attempted logon is invalid.'
-        ]
-        for err in errors_to_rejoin:
-            if err in errstr:
-                return neterr.NOTJOINED
+    @staticmethod
+    def to_status(errout):
+        if RE_ERRORS_TO_REJOIN.search(errout):
+            return neterr.NOTJOINED
 
         return neterr.FAULT
 
@@ -65,6 +162,12 @@ class ActiveDirectoryModel(sa.Model):
 
 class ActiveDirectoryService(ConfigService):
 
+    smb_config_cache = None
+    # Domain name -> monotonic time of last successful testjoin
+    testjoin_verified = {}
+    # Whether NTP servers are still the defaults. None if unknown.
+    default_ntp_servers = None
+
     class Config:
         service = "activedirectory"
         datastore = 'directoryservice.activedirectory'
@@ -99,17 +202,35 @@ class ActiveDirectoryService(ConfigService):
     )
 
     @private
-    async def ad_extend(self, ad):
+    async def smb_config(self):
+        """
+        The SMB configuration is consulted every time the Active Directory configuration
+        is read, which happens frequently. Keep it for a short period of time to avoid
+        repeated lookups. The cache is invalidated by `smb.update`.
+        """
+        if self.smb_config_cache is not None:
+            smb, cache_time = self.smb_config_cache
+            if cache_time > time.monotonic() - SMB_CONFIG_CACHE_TTL:
+                return smb
+
         smb = await self.middleware.call('smb.config')
+        self.smb_config_cache = (smb, time.monotonic())
+        return smb
+
+    @private
+    def invalidate_smb_config_cache(self):
+        self.smb_config_cache = None
+
+    @private
+    async def ad_extend(self, ad):
+        smb = await self.smb_config()
 
         ad.update({
             'netbiosname': smb['netbiosname_local'],
-            'netbiosalias': smb['netbiosalias']
+            'netbiosalias': smb['netbiosalias'].copy()
         })
 
-        if ad.get('nss_info'):
-            ad['nss_info'] = ad['nss_info'].upper()
-        else:
+        if not ad.get('nss_info'):
             ad['nss_info'] = 'TEMPLATE'
 
         if ad.get('kerberos_realm') and type(ad['kerberos_realm']) is dict:
@@ -120,18 +241,11 @@ class ActiveDirectoryService(ConfigService):
     @private
     async def ad_compress(self, ad):
         """
-        Convert kerberos realm to id. Force domain to upper-case. Remove
-        foreign entries.
-        kinit will fail if domain name is lower-case.
+        Remove foreign entries. `domainname` is upper-cased by `do_update`
+        since kinit will fail if domain name is lower-case. `nss_info` is
+        restricted by the schema to upper-case values.
         """
-        for key in ['netbiosname', 'netbiosname_b', 'netbiosalias', 'bindpw']:
-            if key in ad:
-                ad.pop(key)
-
-        if ad.get('nss_info'):
-            ad['nss_info'] = ad['nss_info'].upper()
-
-        return ad
+        return {k: v for k, v in ad.items() if k not in FOREIGN_KEYS}
 
     @accepts()
     @returns(Ref('nss_info_ad'))
@@ -142,10 +256,14 @@ class ActiveDirectoryService(ConfigService):
         return await self.middleware.call('directoryservices.nss_info_choices', 'ACTIVEDIRECTORY')
 
     @private
-    async def update_netbios_data(self, old, new):
+    async def update_netbios_data(self, old, new, data):
+        """
+        `new` is merged with the existing configuration (which is extended with the
+        SMB netbios names) and so `data` is checked for netbios names supplied by the caller.
+        """
         must_update = False
-        for key in ['netbiosname', 'netbiosalias']:
-            if key in new and old[key] != new[key]:
+        for key in NETBIOS_KEYS:
+            if key in data and old[key] != new[key]:
                 if old['enable']:
                     raise ValidationError(
                         f'activedirectory.{key}',
@@ -165,6 +283,25 @@ class ActiveDirectoryService(ConfigService):
 
     @private
     async def common_validate(self, new, old, verrors):
+        # Validating the netbios name requires DNS queries that may be slow to complete and
+        # so it is performed concurrently with validation of the rest of the configuration.
+        await asyncio.gather(
+            self.validate_netbiosname(new, old, verrors),
+            self.validate_config(new, old, verrors),
+        )
+
+    @private
+    async def validate_netbiosname(self, new, old, verrors):
+        if all((
+            new['netbiosname'] == old['netbiosname'],
+            new['domainname'] == old['domainname'],
+            new['enable'] == old['enable'],
+        )):
+            # The name was already validated against this domain when it was last
+            # changed and so there is no need to repeat the (potentially slow) DNS lookups.
+            # We always validate when enabling the service though since we are about to join.
+            return
+
         try:
             if not (await self.middleware.call('activedirectory.netbiosname_is_ours', new['netbiosname'], new['domainname'], new['dns_timeout'])):
                 verrors.add(
@@ -176,6 +313,8 @@ class ActiveDirectoryService(ConfigService):
         except CallError:
             pass
 
+    @private
+    async def validate_config(self, new, old, verrors):
         if new['kerberos_realm'] and new['kerberos_realm'] != old['kerberos_realm']:
             realm = await self.middleware.call('kerberos.realm.query', [("id", "=", new['kerberos_realm'])])
             if not realm:
@@ -187,13 +326,16 @@ class ActiveDirectoryService(ConfigService):
         if not new["enable"]:
             return
 
-        if not await self.middleware.call('pool.query', [], {'count': True}):
+        pool_count, ldap_config = await asyncio.gather(
+            self.middleware.call('pool.query', [], {'count': True}),
+            self.middleware.call('ldap.config'),
+        )
+        if not pool_count:
             verrors.add(
                 "activedirectory_update.enable",
                 "Active Directory service may not be enabled before data pool is created."
             )
-        ldap_enabled = (await self.middleware.call('ldap.config'))['enable']
-        if ldap_enabled:
+        if ldap_config['enable']:
             verrors.add(
                 "activedirectory_update.enable",
                 "Active Directory service may not be enabled while LDAP service is enabled."
@@ -222,13 +364,15 @@ class ActiveDirectoryService(ConfigService):
             )
 
         if new['allow_dns_updates']:
-            ha_mode = await self.middleware.call('smb.get_smb_ha_mode')
+            ha_mode, smb = await asyncio.gather(
+                self.middleware.call('smb.get_smb_ha_mode'),
+                self.middleware.call('smb.config'),
+            )
 
             if ha_mode == 'UNIFIED':
                 if await self.middleware.call('failover.status') != 'MASTER':
                     return
 
-            smb = await self.middleware.call('smb.config')
             addresses = await self.middleware.call(
                 'activedirectory.get_ipaddresses', new, smb, ha_mode
             )
@@ -243,40 +387,20 @@ class ActiveDirectoryService(ConfigService):
 
             for a in addresses:
                 addr = ipaddress.ip_address(a)
-                if addr.is_reserved:
-                    verrors.add(
-                        'activedirectory_update.allow_dns_updates',
-                        f'{addr}: automatic DNS update would result in registering a reserved '
-                        'IP address. Users may disable automatic DNS updates and manually '
-                        'configure DNS A and AAAA records as needed for their domain.'
-                    )
-
-                if addr.is_loopback:
-                    verrors.add(
-                        'activedirectory_update.allow_dns_updates',
-                        f'{addr}: automatic DNS update would result in registering a loopback '
-                        'address. Users may disable automatic DNS updates and manually '
-                        'configure DNS A and AAAA records as needed for their domain.'
-                    )
-
-                if addr.is_link_local:
-                    verrors.add(
-                        'activedirectory_update.allow_dns_updates',
-                        f'{addr}: automatic DNS update would result in registering a link-local '
-                        'address. Users may disable automatic DNS updates and manually '
-                        'configure DNS A and AAAA records as needed for their domain.'
-                    )
-
-                if addr.is_multicast:
-                    verrors.add(
-                        'activedirectory_update.allow_dns_updates',
-                        f'{addr}: automatic DNS update would result in registering a multicast '
-                        'address. Users may disable automatic DNS updates and manually '
-                        'configure DNS A and AAAA records as needed for their domain.'
-                    )
+                for attr, address_type in INVALID_DNS_UPDATE_ADDRESS_TYPES:
+                    if getattr(addr, attr):
+                        verrors.add(
+                            'activedirectory_update.allow_dns_updates',
+                            f'{addr}: automatic DNS update would result in registering a {address_type} '
+                            'address. Users may disable automatic DNS updates and manually '
+                            'configure DNS A and AAAA records as needed for their domain.'
+                        )
 
     @accepts(Ref('activedirectory_update'))
-    @returns(Ref('activedirectory_update'))
+    @returns(Patch(
+        'activedirectory_update', 'activedirectory_update_returns',
+        ('add', Int('job_id', null=True)),
+    ))
     @job(lock="AD_start_stop")
     async def do_update(self, job, data):
         """
@@ -356,7 +480,10 @@ class ActiveDirectoryService(ConfigService):
 
         The Active Directory service is started after a configuration
         update if the service was initially disabled, and the updated
-        configuration sets `enable` to `True`. The Active Directory
+        configuration sets `enable` to `True`. The service is started in
+        a separate `activedirectory.start` job. Its id is returned as
+        `job_id` and may be used to track progress and the result of the
+        domain join. `job_id` is null if no join was started. The Active Directory
         service is stopped if `enable` is changed to `False`. If the
         configuration is updated, but the initial `enable` state is `True`, and
         remains unchanged, then the samba server is only restarted.
@@ -372,7 +499,7 @@ class ActiveDirectoryService(ConfigService):
         new['domainname'] = new['domainname'].upper()
 
         try:
-            await self.update_netbios_data(old, new)
+            await self.update_netbios_data(old, new, data)
         except Exception as e:
             raise ValidationError('activedirectory_update.netbiosname', str(e))
 
@@ -403,24 +530,12 @@ class ActiveDirectoryService(ConfigService):
                     )
 
         if new['enable'] and old['enable']:
-            permitted_keys = [
-                'verbose_logging',
-                'use_default_domain',
-                'allow_trusted_doms',
-                'disable_freenas_cache',
-                'restrict_pam',
-                'timeout',
-                'dns_timeout'
-            ]
-            for entry in old.keys():
-                if entry not in new or entry in permitted_keys:
-                    continue
-
-                if new[entry] != old[entry]:
-                    raise ValidationError(
-                        f'activedirectory.{entry}',
-                        'Parameter may not be changed while the Active Directory service is enabled.'
-                    )
+            changed = {k for k in old.keys() & new.keys() if old[k] != new[k]} - PERMITTED_KEYS_WHILE_ENABLED
+            if changed:
+                raise ValidationError(
+                    f'activedirectory.{next(k for k in old if k in changed)}',
+                    'Parameter may not be changed while the Active Directory service is enabled.'
+                )
 
         elif new['enable'] and not old['enable']:
             """
@@ -444,107 +559,10 @@ class ActiveDirectoryService(ConfigService):
                     'permitted value. This may indicate an NTP misconfiguration.'
                 )
 
-            try:
-                await self.middleware.call(
-                    'activedirectory.check_nameservers',
-                    new['domainname'],
-                    new['site'],
-                    new['dns_timeout']
-                )
-            except CallError as e:
-                raise ValidationError(
-                    'activedirectory.domainname',
-                    e.errmsg
-                )
-
-            try:
-                await self.validate_credentials(new, domain_info['KDC server'])
-            except KRB5Error as e:
-                # initially assume the validation error will be
-                # about the actual password used
-                if new['kerberos_principal']:
-                    key = 'activedirectory.kerberos_principal'
-                else:
-                    key = 'activedirectory.bindpw'
-
-                match e.krb5_code:
-                    case KRB5ErrCode.KRB5_LIBOS_CANTREADPWD:
-                        if key == 'activedirectory.kerberos_principal':
-                            msg = 'Kerberos keytab is no longer valid.'
-                        else:
-                            msg = f'Active Directory account password for user {new["bindname"]} is expired.'
-                    case KRB5ErrCode.KRB5KDC_ERR_CLIENT_REVOKED:
-                        msg = 'Active Directory account is locked.'
-                    case KRB5ErrCode.KRB5_CC_NOTFOUND:
-                        if key == 'activedirectory.kerberos_principal':
-                            # When we kinit we try to regenerate keytab if the principal
-                            # isn't present in it. If we hit this point it means that user
-                            # has been tweaking the system-managed keytab in interesting ways.
-                            choices = await self.middleware.call(
-                                'kerberos.keytab.kerberos_principal_choices'
-                            )
-                            msg = (
-                                'System keytab lacks an entry for the specified kerberos principal. '
-                                f'Please select a valid kerberos principal from available choices: {", ".join(choices)}'
-                            )
-                        else:
-                            # This error shouldn't occur if we're trying to get ticket
-                            # with username + password combination
-                            msg = str(e)
-                    case KRB5ErrCode.KRB5KDC_ERR_POLICY:
-                        msg = (
-                            'Active Directory security policy rejected request to obtain kerberos ticket. '
-                            'This may occur if the bind account has been configured to deny interactive '
-                            'logons or require two-factor authentication. Depending on organizational '
-                            'security policies, one may be required to pre-generate a kerberos keytab '
-                            'and upload to TrueNAS server for use during join process.'
-                        )
-                    case KRB5ErrCode.KRB5KDC_ERR_C_PRINCIPAL_UNKNOWN:
-                        # We're dealing with a missing account
-                        if key == "activedirectory.bindpw":
-                            key = "activedirectory.bindname"
-
-                        msg = (
-                            'Client\'s credentials were not found on remote domain controller. The most '
-                            'common reasons for the domain controller to return this response is due to a '
-                            'typo in the service account name or the service or the computer account being '
-                            'deleted from Active Directory.'
-                        )
-                    case KRB5ErrCode.KRB5KRB_AP_ERR_SKEW:
-                        # Domain permitted clock skew may be more restrictive than our basic
-                        # check of no greater than 3 minutes.
-                        key = 'activedirectory.domainname'
-                        msg = (
-                            'The time offset between the TrueNAS server and the active directory domain '
-                            'controller exceeds the maximum value permitted by the Active Directory '
-                            'configuration. This may occur if NTP is improperly configured on the '
-                            'TrueNAS server or if the hardware clock on the TrueNAS server is configured '
-                            'for a local timezone instead of UTC.'
-                        )
-                    case KRB5ErrCode.KRB5KDC_ERR_PREAUTH_FAILED:
-                        if new['kerberos_principal']:
-                            msg = (
-                                'Kerberos principal credentials are no longer valid. Rejoining active directory '
-                                'may be required.'
-                            )
-                        else:
-                            msg = 'Preauthentication failed. This typically indicates an incorrect bind password.'
-                    case _:
-                        # Catchall for more kerberos errors. We can expand if needed.
-                        msg = str(e)
-
-                raise ValidationError(key, msg)
-            except CallError as e:
-                # This may be an encapsulated GSSAPI library error
-                if e.errno == errno.EINVAL:
-                    # special errno set if GSSAPI BadName exception raised
-                    if new['kerberos_principal']:
-                        raise ValidationError('activedirectory.kerberos_principal', 'Not a valid principal name')
-                    else:
-                        raise ValidationError('activedirectory.bindname', 'Not a valid username')
-
-                # No meaningful way to convert into a ValidationError, simply re-raise
-                raise e from None
+            await self.validate_nameservers(new)
+            # Only kinit with the provided credentials once nameservers are known to be good, so
+            # that a failed validation does not leave a ticket in the system ccache.
+            await self.validate_join_credentials(new, domain_info['KDC server'])
 
         elif not new['enable'] and new.get('bindpw'):
             raise ValidationError(
@@ -558,37 +576,24 @@ class ActiveDirectoryService(ConfigService):
         await self.middleware.call('datastore.update', self._config.datastore, new['id'], config, {'prefix': 'ad_'})
         await self.middleware.call('etc.generate', 'smb')
 
+        start_job_id = None
         if not old['enable'] and new['enable']:
-            ngc = await self.middleware.call('network.configuration.config')
-            if not ngc['domain'] or ngc['domain'] == 'local':
-                try:
-                    await self.middleware.call(
-                        'network.configuration.update',
-                        {'domain': new['domainname']}
-                    )
-                except CallError:
-                    self.logger.warning(
-                        'Failed to update domain name in network configuration '
-                        'to match active directory value of %s', new['domainname'], exc_info=True
-                    )
-
-            if not await self.middleware.call(
-                'kerberos.check_ticket',
-                {'ccache': krb5ccache.SYSTEM.name},
-                False
-            ):
-                await self.middleware.call('kerberos.start')
-
             try:
-                await self.__start(job)
-            except Exception as e:
-                self.logger.error('Failed to start active directory service. Disabling.')
-                await self.set_state(DSStatus['DISABLED'].name)
-                await self.middleware.call(
-                    'datastore.update', self._config.datastore, new['id'],
-                    {'enable': False}, {'prefix': 'ad_'}
+                await self.middleware.call('network.configuration.set_default_domain', new['domainname'])
+            except CallError:
+                self.logger.warning(
+                    'Failed to update domain name in network configuration '
+                    'to match active directory value of %s', new['domainname'], exc_info=True
                 )
-                raise e
+
+            # validate_credentials() above has already ensured that we have a valid TGT in
+            # the system ccache, and so there is no need to check the ticket again here.
+
+            # Joining the domain may take a considerable amount of time if domain controllers
+            # are slow to respond. It is performed in a separate job that will acquire the
+            # AD_start_stop lock once this job completes.
+            start_job = await self.middleware.call('activedirectory.start')
+            start_job_id = start_job.id
 
         elif not new['enable'] and old['enable']:
             await self.__stop(job, new)
@@ -596,7 +601,58 @@ class ActiveDirectoryService(ConfigService):
         elif new['enable'] and old['enable']:
             await self.middleware.call('service.restart', 'idmap')
 
-        return await self.config()
+        return await self.config() | {'job_id': start_job_id}
+
+    @private
+    async def validate_nameservers(self, new):
+        try:
+            await self.middleware.call(
+                'activedirectory.check_nameservers',
+                new['domainname'],
+                new['site'],
+                new['dns_timeout']
+            )
+        except CallError as e:
+            raise ValidationError(
+                'activedirectory.domainname',
+                e.errmsg
+            )
+
+    @private
+    async def validate_join_credentials(self, new, kdc):
+        try:
+            await self.validate_credentials(new, kdc)
+        except KRB5Error as e:
+            raise await self.krb5_error_to_validation_error(new, e)
+        except CallError as e:
+            # This may be an encapsulated GSSAPI library error
+            if e.errno == errno.EINVAL:
+                # special errno set if GSSAPI BadName exception raised
+                if new['kerberos_principal']:
+                    raise ValidationError('activedirectory.kerberos_principal', 'Not a valid principal name')
+                else:
+                    raise ValidationError('activedirectory.bindname', 'Not a valid username')
+
+            # No meaningful way to convert into a ValidationError, simply re-raise
+            raise e from None
+
+    @private
+    async def krb5_error_to_validation_error(self, new, error):
+        keytab = bool(new['kerberos_principal'])
+        if (entry := KRB5_VALIDATION_ERRORS.get((error.krb5_code, keytab))) is None:
+            # Catchall for more kerberos errors. We can expand if needed.
+            return ValidationError(
+                'activedirectory.kerberos_principal' if keytab else 'activedirectory.bindpw', str(error)
+            )
+
+        key, msg = entry
+        if error.krb5_code == KRB5ErrCode.KRB5_CC_NOTFOUND:
+            choices = await self.middleware.call('kerberos.keytab.kerberos_principal_choices')
+            msg = msg.format(choices=', '.join(choices))
+        else:
+            msg = msg.format(bindname=new['bindname'])
+
+        return ValidationError(f'activedirectory.{key}', msg)
 
     @private
     async def set_state(self, state):
@@ -662,20 +718,47 @@ class ActiveDirectoryService(ConfigService):
         smb = data['smb_config']
         smb_ha_mode = data['ha_mode']
 
-        await self.middleware.call('activedirectory.register_dns', ad, smb, smb_ha_mode)
-
         """
         Manipulating the SPN entries must be done with elevated privileges. Add NFS service
         principals while we have these on-hand.
         Since this may potentially take more than a minute to complete, run in background job.
+        DNS registration is independent of the SPN changes and so is performed concurrently.
         """
-        job.set_progress(60, 'Adding NFS Principal entries.')
+        job.set_progress(60, 'Registering DNS and adding NFS Principal entries.')
         # Skip health check for add_nfs_spn since by this point our AD join should be de-facto healthy.
         spn_job = await self.middleware.call('activedirectory.add_nfs_spn', ad['netbiosname'], ad['domainname'], False, False)
-        await spn_job.wait()
+        dns_result, spn_added = await asyncio.gather(
+            self.middleware.call('activedirectory.register_dns', ad, smb, smb_ha_mode),
+            spn_job.wait(),
+            return_exceptions=True
+        )
+        if isinstance(dns_result, Exception):
+            raise dns_result
 
-        job.set_progress(70, 'Storing computer account keytab.')
-        await self.middleware.call('kerberos.keytab.store_ad_keytab')
+        # add_nfs_spn stores the keytab itself after successfully updating SPNs. Storing
+        # it concurrently with the SPN job is not safe since both would update the same
+        # AD_MACHINE_ACCOUNT keytab entry.
+        if spn_added is not True:
+            job.set_progress(70, 'Storing computer account keytab.')
+            await self.middleware.call('kerberos.keytab.store_ad_keytab')
+
+    @private
+    @job(lock="AD_start_stop")
+    async def start(self, job):
+        """
+        Start the Active Directory service. If this fails, then the service is
+        disabled in the configuration.
+        """
+        try:
+            return await self.__start(job)
+        except Exception:
+            self.logger.error('Failed to start active directory service. Disabling.')
+            await self.set_state(DSStatus['DISABLED'].name)
+            await self.middleware.call(
+                'datastore.update', self._config.datastore, (await self.config())['id'],
+                {'enable': False}, {'prefix': 'ad_'}
+            )
+            raise
 
     async def __start(self, job):
         """
@@ -727,7 +810,7 @@ class ActiveDirectoryService(ConfigService):
                 'datastore.update', self._config.datastore, ad['id'],
                 {"kerberos_realm": realm_id}, {'prefix': 'ad_'}
             )
-            ad = await self.config()
+            ad['kerberos_realm'] = realm_id
 
         if not await self.middleware.call(
             'kerberos.check_ticket',
@@ -769,7 +852,12 @@ class ActiveDirectoryService(ConfigService):
 
         job.set_progress(40, 'Performing testjoin to Active Directory Domain')
         machine_acct = f'{ad["netbiosname"].upper()}$@{ad["domainname"]}'
-        ret = await self._net_ads_testjoin(workgroup, ad)
+        last_verified = self.testjoin_verified.get(ad['domainname'])
+        if ad['kerberos_principal'] and last_verified and time.monotonic() - last_verified < TESTJOIN_TTL:
+            ret = neterr.JOINED
+        else:
+            ret = await self._net_ads_testjoin(workgroup, ad)
+
         if ret == neterr.NOTJOINED:
             job.set_progress(50, 'Joining Active Directory Domain')
             self.logger.debug(f"Test join to {ad['domainname']} failed. Performing domain join.")
@@ -790,8 +878,7 @@ class ActiveDirectoryService(ConfigService):
             await self.middleware.call('datastore.update', self._config.datastore, ad['id'], {
                 'kerberos_principal': machine_acct
             }, {'prefix': 'ad_'})
-
-            ad = await self.config()
+            ad['kerberos_principal'] = machine_acct
 
             job.set_progress(75, 'Performing kinit using new computer account.')
 
@@ -814,7 +901,9 @@ class ActiveDirectoryService(ConfigService):
             await self.middleware.call('kerberos.kdestroy')
 
             # remove stub krb5.conf to allow overriding with fix on KDC
-            await self.middleware.run_in_thread(os.unlink, '/etc/krb5.conf')
+            with contextlib.suppress(FileNotFoundError):
+                await self.middleware.run_in_thread(os.unlink, '/etc/krb5.conf')
+
             await self.middleware.call('kerberos.do_kinit', {
                 'krb5_cred': cred,
                 'kinit-options': {
@@ -825,10 +914,17 @@ class ActiveDirectoryService(ConfigService):
             await self.middleware.call('etc.generate', 'kerberos')
 
             job.set_progress(80, 'Configuring idmap backend and NTP servers.')
-            await self.middleware.call('service.update', 'cifs', {'enable': True})
-            await self.set_idmap(ad['allow_trusted_doms'], ad['domainname'])
-            await self.middleware.call('activedirectory.set_ntp_servers')
-            await self.middleware.call("directoryservices.secrets.backup")
+            # These are independent of one another. Wait for all of them to
+            # complete before raising the first failure.
+            for result in await asyncio.gather(
+                self.middleware.call('service.update', 'cifs', {'enable': True}),
+                self.set_idmap(ad['allow_trusted_doms'], ad['domainname']),
+                self.middleware.call('activedirectory.set_ntp_servers', dc_info),
+                self.middleware.call("directoryservices.secrets.backup"),
+                return_exceptions=True
+            ):
+                if isinstance(result, Exception):
+                    raise result
             ret = neterr.JOINED
         elif ret == neterr.JOINED:
             # We are already joined to AD. User may have disabled then re-renabled the plugin
@@ -844,8 +940,11 @@ class ActiveDirectoryService(ConfigService):
 
         await self.middleware.call('etc.generate', 'smb')
         await self.middleware.call('service.restart', 'idmap')
-        await self.middleware.call('etc.generate', 'pam')
-        await self.middleware.call('etc.generate', 'nss')
+        # pam and nss configuration is generated once winbindd is running
+        await asyncio.gather(
+            self.middleware.call('etc.generate', 'pam'),
+            self.middleware.call('etc.generate', 'nss'),
+        )
         if ret == neterr.JOINED:
             await self.set_state(DSStatus['HEALTHY'].name)
             job.set_progress(90, 'Restarting dependent services.')
@@ -873,6 +972,7 @@ class ActiveDirectoryService(ConfigService):
 
     async def __stop(self, job, config):
         job.set_progress(0, 'Preparing to stop Active Directory service')
+        self.testjoin_verified.pop(config['domainname'], None)
         await self.middleware.call(
             'datastore.update', self._config.datastore,
             config['id'], {'ad_enable': False}
@@ -887,8 +987,10 @@ class ActiveDirectoryService(ConfigService):
         await self.middleware.call('service.stop', 'cifs')
         await self.middleware.call('service.restart', 'idmap')
         job.set_progress(40, 'Reconfiguring pam and nss.')
-        await self.middleware.call('etc.generate', 'pam')
-        await self.middleware.call('etc.generate', 'nss')
+        await asyncio.gather(
+            self.middleware.call('etc.generate', 'pam'),
+            self.middleware.call('etc.generate', 'nss'),
+        )
         await self.set_state(DSStatus['DISABLED'].name)
         job.set_progress(60, 'clearing caches.')
         await self.middleware.call('directoryservices.cache.abort_refresh')
@@ -949,9 +1051,7 @@ class ActiveDirectoryService(ConfigService):
     async def _net_ads_join(self, workgroup, ad):
         await self.middleware.call("kerberos.check_ticket")
         cmd = [
-            SMBCmd.NET.value,
-            '--use-kerberos', 'required',
-            '--use-krb5-ccache', krb5ccache.SYSTEM.value,
+            *NET_KERBEROS_ARGS,
             '-w', workgroup,
             '-U', ad['bindname'],
             '-d', '5',
@@ -985,9 +1085,7 @@ class ActiveDirectoryService(ConfigService):
             ad = await self.config()
 
         cmd = [
-            SMBCmd.NET.value,
-            '--use-kerberos', 'required',
-            '--use-krb5-ccache', krb5ccache.SYSTEM.value,
+            *NET_KERBEROS_ARGS,
             '-w', workgroup,
             '-d', '5',
             'ads', 'testjoin'
@@ -995,12 +1093,12 @@ class ActiveDirectoryService(ConfigService):
 
         netads = await run(cmd, check=False)
         if netads.returncode != 0:
-            errout = netads.stderr.decode()
-            with open(f"{SMBPath.LOGDIR.platform()}/domain_testjoin_{int(datetime.datetime.now().timestamp())}.log", "w") as f:
-                f.write(errout)
+            await self.middleware.run_in_thread(write_testjoin_log, netads.stderr)
 
-            return neterr.to_status(errout)
+            self.testjoin_verified.pop(ad['domainname'], None)
+            return neterr.to_status(netads.stderr)
 
+        self.testjoin_verified[ad['domainname']] = time.monotonic()
         return neterr.JOINED
 
     @private
@@ -1008,9 +1106,7 @@ class ActiveDirectoryService(ConfigService):
         await self.middleware.call('kerberos.check_ticket')
 
         cmd = [
-            SMBCmd.NET.value,
-            '--use-kerberos', 'required',
-            '--use-krb5-ccache', krb5ccache.SYSTEM.value,
+            *NET_KERBEROS_ARGS,
             '-U', data['username'],
             'ads', 'leave',
         ]
@@ -1071,26 +1167,32 @@ class ActiveDirectoryService(ConfigService):
 
             raise CallError(netads.stderr.decode())
 
-        return json.loads(netads.stdout.decode())
+        return orjson.loads(netads.stdout)
 
     @private
-    async def set_ntp_servers(self):
+    async def set_ntp_servers(self, dc_info=None):
         """
         Appropriate time sources are a requirement for an AD environment. By default kerberos authentication
         fails if there is more than a 5 minute time difference between the AD domain and the member server.
+
+        `dc_info` may be provided by callers that have already looked up the domain controller.
         """
-        ntp_servers = await self.middleware.call('system.ntpserver.query')
-        ntp_pool = 'debian.pool.ntp.org'
-        default_ntp_servers = list(filter(lambda x: ntp_pool in x['address'], ntp_servers))
-        if len(ntp_servers) != 3 or len(default_ntp_servers) != 3:
-            return
+        if self.default_ntp_servers is None:
+            ntp_servers = await self.middleware.call('system.ntpserver.query')
+            ntp_pool = 'debian.pool.ntp.org'
+            default_ntp_servers = list(filter(lambda x: ntp_pool in x['address'], ntp_servers))
+            self.default_ntp_servers = len(ntp_servers) == 3 and len(default_ntp_servers) == 3
 
-        try:
-            dc_info = await self.lookup_dc()
-        except CallError:
-            self.logger.warning("Failed to automatically set time source.", exc_info=True)
+        if not self.default_ntp_servers:
             return
 
+        if dc_info is None:
+            try:
+                dc_info = await self.lookup_dc()
+            except CallError:
+                self.logger.warning("Failed to automatically set time source.", exc_info=True)
+                return
+
         if not dc_info['Flags']['Is running time services']:
             return
 
@@ -1105,13 +1207,21 @@ class ActiveDirectoryService(ConfigService):
         return
 
     @private
-    async def cache_flush_retry(self, cmd, retry=True):
-        rv = await run(cmd, check=False)
-        if rv.returncode != 0 and retry:
+    async def cache_flush_retry(self, cmd, retries=1):
+        """
+        Run `cmd`, flushing the gencache and retrying up to `retries` times
+        on failure. Result of final attempt is returned.
+        """
+        for attempt in range(retries + 1):
+            rv = await run(cmd, check=False)
+            if rv.returncode == 0 or attempt == retries:
+                return rv
+
             await self.middleware.call('idmap.gencache.flush')
-            return await self.cache_flush_retry(cmd, False)
 
-        return rv
+    @private
+    def invalidate_default_ntp_servers(self):
+        self.default_ntp_servers = None
 
     @private
     async def lookup_dc(self, domain=None):
@@ -1123,8 +1233,7 @@ class ActiveDirectoryService(ConfigService):
             raise CallError("Failed to look up Domain Controller information: "
                             f"{lookup.stderr.decode().strip()}")
 
-        out = json.loads(lookup.stdout.decode())
-        return out
+        return orjson.loads(lookup.stdout)
 
     @accepts(Ref('kerberos_username_password'), roles=['DIRECTORY_SERVICE_WRITE'])
     @returns()
@@ -1166,6 +1275,7 @@ class ActiveDirectoryService(ConfigService):
         await self.middleware.call('kerberos.do_kinit', {'krb5_cred': cred})
 
         job.set_progress(10, 'Leaving Active Directory domain.')
+        self.testjoin_verified.clear()
         left_successfully = await self._net_ads_leave(data)
 
         job.set_progress(15, 'Removing DNS entries')
@@ -1217,18 +1327,28 @@ class ActiveDirectoryService(ConfigService):
             self.logger.warning("Failed to flush cache after leaving Active Directory.", exc_info=True)
 
         with contextlib.suppress(FileNotFoundError):
-            os.unlink('/etc/krb5.keytab')
+            await self.middleware.run_in_thread(os.unlink, '/etc/krb5.keytab')
 
         job.set_progress(50, 'Clearing kerberos configuration and ticket.')
         await self.middleware.call('kerberos.stop')
 
         job.set_progress(60, 'Regenerating configuration.')
-        await self.middleware.call('etc.generate', 'pam')
-        await self.middleware.call('etc.generate', 'nss')
-        await self.middleware.call('etc.generate', 'smb')
+        await asyncio.gather(
+            self.middleware.call('etc.generate', 'pam'),
+            self.middleware.call('etc.generate', 'nss'),
+            self.middleware.call('etc.generate', 'smb'),
+        )
 
         job.set_progress(60, 'Restarting services.')
         await self.middleware.call('service.restart', 'cifs')
         await self.middleware.call('service.restart', 'idmap')
         job.set_progress(100, 'Successfully left activedirectory domain.')
         return
+
+
+async def _event_ntpserver(middleware, event_type, args):
+    await middleware.call('activedirectory.invalidate_default_ntp_servers')
+
+
+async def setup(middleware):
+    middleware.event_subscribe('system.ntpserver.query', _event_ntpserver)
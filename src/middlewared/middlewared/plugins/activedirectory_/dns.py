@@ -1,3 +1,4 @@
+import asyncio
 import dns
 import enum
 import errno
@@ -29,10 +30,8 @@ class ActiveDirectoryService(Service):
         if not ad['allow_dns_updates']:
             return
 
-        netbiosname = (await self.middleware.call('smb.config'))['netbiosname_local']
-        domain = ad['domainname']
-
-        hostname = f'{netbiosname}.{domain}'
+        # `netbiosname` is populated from the SMB configuration by activedirectory.config
+        hostname = f'{ad["netbiosname"]}.{ad["domainname"]}'
         try:
             dns_addresses = set([x['address'] for x in await self.middleware.call('dnsclient.forward_lookup', {
                 'names': [hostname]
@@ -73,8 +72,6 @@ class ActiveDirectoryService(Service):
 
     @private
     async def ipaddresses_to_register(self, data, valid_only=True):
-        validated_ips = []
-
         ips = [i['address'] for i in (await self.middleware.call('interface.ip_in_use'))]
 
         if data['bindip']:
@@ -82,49 +79,52 @@ class ActiveDirectoryService(Service):
         else:
             to_check = set(ips)
 
-        for ip in to_check:
-            try:
-                result = await self.middleware.call('dnsclient.reverse_lookup', {
-                    'addresses': [ip]
-                })
-            except dns.resolver.NXDOMAIN:
-                # This may simply mean entry was not found
-                validated_ips.append(ip)
-
-            except dns.resolver.LifetimeTimeout:
-                self.logger.warning(
-                    '%s: DNS operation timed out while trying to resolve reverse pointer '
-                    'for IP address.',
-                    ip
-                )
-
-            except dns.resolver.NoNameservers:
-                self.logger.warning(
-                    'No nameservers configured to handle reverse pointer for %s. '
-                    'Omitting from list of addresses to use for Active Directory purposes.',
-                    ip
-                )
-                continue
-
-            except Exception:
-                # DNS for this IP may be simply wildly misconfigured and time out
-                self.logger.warning(
-                    'Reverse lookup of %s failed, omitting from list '
-                    'of addresses to use for Active Directory purposes.',
-                    ip, exc_info=True
-                )
-                continue
+        # Reverse lookups may be slow to complete and so they are performed concurrently
+        results = await asyncio.gather(*[self.validate_ipaddress(ip, data['hostname'], valid_only) for ip in to_check])
+        return [ip for ip in results if ip is not None]
 
-            else:
-                if result[0]['target'].casefold() != data['hostname'].casefold():
-                    errmsg = f'Reverse lookup of {ip} points to {result[0]["target"]}, expected {data["hostname"]}.'
-                    self.logger.warning(errmsg)
-                    if valid_only:
-                        continue
+    @private
+    async def validate_ipaddress(self, ip, hostname, valid_only):
+        try:
+            result = await self.middleware.call('dnsclient.reverse_lookup', {
+                'addresses': [ip]
+            })
+        except dns.resolver.NXDOMAIN:
+            # This may simply mean entry was not found
+            return ip
+
+        except dns.resolver.LifetimeTimeout:
+            self.logger.warning(
+                '%s: DNS operation timed out while trying to resolve reverse pointer '
+                'for IP address.',
+                ip
+            )
+
+        except dns.resolver.NoNameservers:
+            self.logger.warning(
+                'No nameservers configured to handle reverse pointer for %s. '
+                'Omitting from list of addresses to use for Active Directory purposes.',
+                ip
+            )
+
+        except Exception:
+            # DNS for this IP may be simply wildly misconfigured and time out
+            self.logger.warning(
+                'Reverse lookup of %s failed, omitting from list '
+                'of addresses to use for Active Directory purposes.',
+                ip, exc_info=True
+            )
+
+        else:
+            if result[0]['target'].casefold() != hostname.casefold():
+                errmsg = f'Reverse lookup of {ip} points to {result[0]["target"]}, expected {hostname}.'
+                self.logger.warning(errmsg)
+                if valid_only:
+                    return None
 
-                validated_ips.append(ip)
+            return ip
 
-        return validated_ips
+        return None
 
     @private
     async def get_ipaddresses(self, ad, smb, smb_ha_mode):
@@ -1,3 +1,5 @@
+import copy
+import os
 import pathlib
 import re
 
@@ -27,6 +29,7 @@ def is_iscsi_device(dev):
 class DeviceService(Service):
 
     DISK_ROTATION_ERROR_LOG_CACHE = set()
+    GPU_CACHE = {'pci_devices': None, 'gpus': []}
 
     @private
     @cache
@@ -286,8 +289,14 @@ class DeviceService(Service):
 
     @private
     def get_gpus(self):
-        gpus = get_gpus()
-        to_isolate_gpus = self.middleware.call_sync('system.advanced.config')['isolated_gpu_pci_ids']
+        # Enumerating gpus shells out to lspci and walks udev which is expensive. GPU topology only
+        # changes on PCI hotplug so we only refresh the cache when the set of PCI devices changes.
+        pci_devices = frozenset(os.listdir('/sys/bus/pci/devices'))
+        if pci_devices != self.GPU_CACHE['pci_devices']:
+            self.GPU_CACHE.update({'pci_devices': pci_devices, 'gpus': get_gpus()})
+
+        gpus = copy.deepcopy(self.GPU_CACHE['gpus'])
+        to_isolate_gpus = set(self.middleware.call_sync('system.advanced.config')['isolated_gpu_pci_ids'])
         for gpu in gpus:
             gpu['available_to_host'] = gpu['addr']['pci_slot'] not in to_isolate_gpus
         return gpus
@@ -1,5 +1,4 @@
 import asyncio
-import enum
 import os
 import struct
 import errno
@@ -9,24 +8,12 @@ from middlewared.schema import accepts, Dict, List, OROperator, Ref, returns, St
 from middlewared.service import no_authz_required, Service, private, job
 from middlewared.service_exception import CallError, MatchNotFound
 from middlewared.utils.directoryservices.constants import (
-    DSStatus, DSType, NSS_Info
+    DSStatus, DSType, NSS_Info, SASL_Wrapping, SSL, nss_types_for_dstype
 )
 
 DEPENDENT_SERVICES = ['smb', 'nfs', 'ssh']
 
 
-class SSL(enum.Enum):
-    NOSSL = 'OFF'
-    USESSL = 'ON'
-    USESTARTTLS = 'START_TLS'
-
-
-class SASL_Wrapping(enum.Enum):
-    PLAIN = 'PLAIN'
-    SIGN = 'SIGN'
-    SEAL = 'SEAL'
-
-
 class DirectoryServices(Service):
     class Config:
         service = "directoryservices"
@@ -163,27 +150,20 @@ class DirectoryServices(Service):
     @returns(OROperator(
         List('ad_nss_choices', items=[Str(
             'nss_info_ad',
-            enum=[x.value[0] for x in NSS_Info if DSType.AD in x.value[1]],
-            default=NSS_Info.SFU.value[0],
+            enum=list(nss_types_for_dstype(DSType.AD)),
+            default=NSS_Info.SFU.nss_type,
             register=True
         )]),
         List('ldap_nss_choices', items=[Str(
             'nss_info_ldap',
-            enum=[x.value[0] for x in NSS_Info if DSType.LDAP in x.value[1]],
-            default=NSS_Info.RFC2307.value[0],
+            enum=list(nss_types_for_dstype(DSType.LDAP)),
+            default=NSS_Info.RFC2307.nss_type,
             register=True)
         ]),
         name='nss_info_choices'
     ))
     async def nss_info_choices(self, dstype):
-        ds = DSType(dstype)
-        ret = []
-
-        for x in list(NSS_Info):
-            if ds in x.value[1]:
-                ret.append(x.value[0])
-
-        return ret
+        return list(nss_types_for_dstype(DSType.from_wire(dstype)))
 
     @private
     async def get_last_password_change(self, domain=None):
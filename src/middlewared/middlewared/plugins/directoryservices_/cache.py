@@ -218,7 +218,7 @@ class DSCache(Service):
             )
             return
 
-        ds_type = DSType(ds['type'])
+        ds_type = DSType.from_wire(ds['type'])
         if ds_type is DSType.AD:
             self.idmap_online_check_wait_wbclient(job)
             domain_info = self.middleware.call_sync(
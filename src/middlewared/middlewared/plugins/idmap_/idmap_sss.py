@@ -1,50 +1,55 @@
 import pysss_nss_idmap as sssclient
+import threading
+import time
 
 from .idmap_constants import IDType
 from middlewared.service_exception import MatchNotFound
 
+# Precomputed IDType lookups for building idmap entries
+ID_TYPE_NAMES = {t.value: t.name for t in IDType}
+ID_TYPE_WBC_STRS = {t.name: t.wbc_str() for t in IDType}
 
-class SSSClient:
+# Process-wide cache of uid / gid -> idmap entry conversions. Keys are in the
+# form returned by users_and_groups_to_idmap_entries (e.g. "UID:565200020") and
+# values are tuples of (monotonic expiry time, entry). Cache is cleared when
+# sssd is started, stopped or restarted.
+IDMAP_CACHE = {}
+IDMAP_CACHE_LOCK = threading.Lock()
+IDMAP_CACHE_MAX_ENTRIES = 4096
+IDMAP_CACHE_TTL = 300
 
-    def _username_to_entry(self, username):
-        """
-        Sample entry returned by pysss_nss_idmap
 
-        `getsidbyusername`
-        {'smbuser': {'sid': 'S-1-5-21-3696504179-2855309571-923743039-1020', 'type': 1}}
+class SSSClient:
 
-        `getidbysid`
-        {'S-1-5-21-3696504179-2855309571-923743039-1020': {'id': 565200020, 'type': 1}}
+    @staticmethod
+    def invalidate_cache():
+        with IDMAP_CACHE_LOCK:
+            IDMAP_CACHE.clear()
 
-        Sample of what we return:
-        {
-            'id_type': 'USER',
-            'id': 565200020,
-            'name': 'smbuser',
-            'sid': 'S-1-5-21-3696504179-2855309571-923743039-1020'
-        }
-        """
-        if not (sid_entry := sssclient.getsidbyusername(username)):
-            return None
+    def _cache_get(self, key, now):
+        with IDMAP_CACHE_LOCK:
+            if (cached := IDMAP_CACHE.get(key)) is None:
+                return None
 
-        sid = sid_entry[username]['sid']
-        id_type = sid_entry[username]['type']
+            if cached[0] < now:
+                del IDMAP_CACHE[key]
+                return None
 
-        if not (id_entry := sssclient.getidbysid(sid)):
-            return None
+        return cached[1].copy()
 
-        return {
-            'id_type': IDType(id_type).name,
-            'id': id_entry[sid]['id'],
-            'name': username,
-            'sid': sid
-        }
+    def _cache_set(self, entries, now):
+        with IDMAP_CACHE_LOCK:
+            if len(IDMAP_CACHE) + len(entries) > IDMAP_CACHE_MAX_ENTRIES:
+                IDMAP_CACHE.clear()
 
-    def _groupname_to_entry(self, groupname):
+            for key, entry in entries.items():
+                IDMAP_CACHE[key] = (now + IDMAP_CACHE_TTL, entry.copy())
+
+    def _name_to_entry(self, name):
         """
         Sample entry returned by pysss_nss_idmap
 
-        `getsidbygroupname`
+        `getsidbyname`
         {'smbuser': {'sid': 'S-1-5-21-3696504179-2855309571-923743039-1020', 'type': 1}}
 
         `getidbysid`
@@ -52,76 +57,25 @@ class SSSClient:
 
         Sample of what we return:
         {
-            'id_type': 'GROUP',
+            'id_type': 'USER',
             'id': 565200020,
             'name': 'smbuser',
             'sid': 'S-1-5-21-3696504179-2855309571-923743039-1020'
         }
         """
-        if not (sid_entry := sssclient.getsidbygroupname(groupname)):
+        if not (sid_entry := sssclient.getsidbyname(name)):
             return None
 
-        sid = sid_entry[groupname]['sid']
-        id_type = sid_entry[groupname]['type']
+        sid = sid_entry[name]['sid']
+        id_type = sid_entry[name]['type']
 
         if not (id_entry := sssclient.getidbysid(sid)):
             return None
 
         return {
-            'id_type': IDType(id_type).name,
+            'id_type': ID_TYPE_NAMES[id_type],
             'id': id_entry[sid]['id'],
-            'name': groupname,
-            'sid': sid
-        }
-
-    def _gid_to_entry(self, gid):
-        """ convert gid to idmap entry dict -- see above _groupname_to_entry()"""
-        if not (sid_entry := sssclient.getsidbygid(gid)):
-            return None
-
-        sid = sid_entry[gid]['sid']
-        id_type = sid_entry[gid]['type']
-
-        if not (name_entry := sssclient.getnamebysid(sid)):
-            return None
-
-        return {
-            'id_type': IDType(id_type).name,
-            'id': gid,
-            'name': name_entry[sid]['name'],
-            'sid': sid
-        }
-
-    def _uid_to_entry(self, uid):
-        """ convert gid to idmap entry dict -- see above _username_to_entry()"""
-        if not (sid_entry := sssclient.getsidbyuid(uid)):
-            return None
-
-        sid = sid_entry[uid]['sid']
-        id_type = sid_entry[uid]['type']
-
-        if not (name_entry := sssclient.getnamebysid(sid)):
-            return None
-
-        return {
-            'id_type': IDType(id_type).name,
-            'id': uid,
-            'name': name_entry[sid]['name'],
-            'sid': sid
-        }
-
-    def _sid_to_entry(self, sid):
-        """ convert sid to idmap entry dict -- see above _username_to_entry()"""
-        if not (id_entry := sssclient.getidbysid(sid)):
-            return None
-
-        if not (name_entry := sssclient.getnamebysid(sid)):
-            return None
-
-        return {
-            'id_type': IDType(id_entry[sid]['type']).name,
-            'id': id_entry[id_entry[sid]]['id'],
-            'name': name_entry[sid]['name'],
+            'name': name,
             'sid': sid
         }
 
@@ -145,12 +99,25 @@ class SSSClient:
         }
         """
         out = {'mapped': {}, 'unmapped': {}}
+        if not sidlist:
+            return out
+
+        # pysss_nss_idmap accepts a list of sids and returns a dict keyed by
+        # sid containing only entries that were successfully resolved.
+        id_entries = sssclient.getidbysid(sidlist)
+        name_entries = sssclient.getnamebysid(sidlist)
+
         for sid in sidlist:
-            if not (entry := self._sid_to_entry(sid)):
+            if sid not in id_entries or sid not in name_entries:
                 out['unmapped'][sid] = sid
                 continue
 
-            out['mapped'][sid] = entry
+            out['mapped'][sid] = {
+                'id_type': ID_TYPE_NAMES[id_entries[sid]['type']],
+                'id': id_entries[sid]['id'],
+                'name': name_entries[sid]['name'],
+                'sid': sid
+            }
 
         return out
 
@@ -174,44 +141,85 @@ class SSSClient:
         }
         """
         out = {'mapped': {}, 'unmapped': {}}
+        to_resolve = []
+        uids = set()
+        gids = set()
+        now = time.monotonic()
 
         for uidgid in uidgids:
+            if (wbc_str := ID_TYPE_WBC_STRS.get(uidgid['id_type'])) is None:
+                raise ValueError(f'{uidgid["id_type"]}: Unknown id_type')
+
+            key = f'{wbc_str}:{uidgid["id"]}'
+            if (entry := self._cache_get(key, now)) is not None:
+                out['mapped'][key] = entry
+                continue
+
+            to_resolve.append((key, uidgid))
             match uidgid['id_type']:
                 case 'GROUP':
-                    entry = self._gid_to_entry(uidgid['id'])
+                    gids.add(uidgid['id'])
                 case 'USER':
-                    entry = self._uid_to_entry(uidgid['id'])
+                    uids.add(uidgid['id'])
                 case 'BOTH':
-                    if not (entry := self._gid_to_entry(uidgid['id'])):
-                        entry = self._uid_to_entry(uidgid['id'])
-                case _:
-                    raise ValueError(f'{uidgid["id_type"]}: Unknown id_type')
+                    gids.add(uidgid['id'])
+                    uids.add(uidgid['id'])
+
+        if not to_resolve:
+            return out
+
+        # Resolve all ids to sids, and then all sids to names, with one
+        # pysss_nss_idmap call each. Results only contain resolved entries.
+        sids_by_uid = sssclient.getsidbyuid(list(uids)) if uids else {}
+        sids_by_gid = sssclient.getsidbygid(list(gids)) if gids else {}
+        sids = {x['sid'] for x in sids_by_uid.values()} | {x['sid'] for x in sids_by_gid.values()}
+        names = sssclient.getnamebysid(list(sids)) if sids else {}
+
+        resolved = {}
+        for key, uidgid in to_resolve:
+            xid = uidgid['id']
+            match uidgid['id_type']:
+                case 'GROUP':
+                    candidates = (sids_by_gid.get(xid),)
+                case 'USER':
+                    candidates = (sids_by_uid.get(xid),)
+                case 'BOTH':
+                    candidates = (sids_by_gid.get(xid), sids_by_uid.get(xid))
+
+            entry = None
+            for sid_entry in candidates:
+                if sid_entry and sid_entry['sid'] in names:
+                    entry = {
+                        'id_type': ID_TYPE_NAMES[sid_entry['type']],
+                        'id': xid,
+                        'name': names[sid_entry['sid']]['name'],
+                        'sid': sid_entry['sid']
+                    }
+                    break
 
-            key = f'{IDType[uidgid["id_type"]].wbc_str()}:{uidgid["id"]}'
             if not entry:
                 out['unmapped'][key] = entry
                 continue
 
-            out['mapped'][key] = entry
+            resolved[key] = entry
 
+        self._cache_set(resolved, now)
+        out['mapped'] |= resolved
         return out
 
     def sid_to_idmap_entry(self, sid):
         """ convert a single sid to an idmap entry dict """
-        if not (entry := self._sid_to_entry(sid)):
+        if not (entry := self.sids_to_idmap_entries([sid])['mapped'].get(sid)):
             raise MatchNotFound(sid)
 
         return entry
 
     def name_to_idmap_entry(self, name):
         """ convert a single name (user or group) to an idmap entry dict """
-        if entry := self._groupname_to_entry(name):
-            return entry
-
-        if entry := self._username_to_entryd(name):
-            return entry
+        if not (entry := self._name_to_entry(name)):
+            raise MatchNotFound(name)
 
-        raise MatchNotFound(name)
+        return entry
 
     def uidgid_to_idmap_entry(self, data):
         """ convert a single name (user or group) to an idmap entry dict """
@@ -219,5 +227,5 @@ class SSSClient:
         if not mapped:
             raise MatchNotFound(str(data))
 
-        key = f'{IDType[data["id_type"]].wbc_str()}:{data["id"]}'
+        key = f'{ID_TYPE_WBC_STRS[data["id_type"]]}:{data["id"]}'
         return mapped[key]
@@ -1,6 +1,7 @@
 # -*- coding=utf-8 -*-
 import collections
 import enum
+import functools
 import ipaddress
 import logging
 import os
@@ -21,34 +22,53 @@ DEFAULT_TABLE_ID = 254  # This is the default table named as "main" and most of
 ip = IPRoute()
 
 
+IPROUTE2_RT_TABLES_PATH = "iproute2/rt_tables"
+# iproute2 location order by version descending
+IPROUTE2_DEFAULT_PATHS = ["/usr/share", "/usr/lib", "/usr"]
+IPROUTE2_LOCAL_RT_TABLES_PATH = "/etc/iproute2/rt_tables"
+# Package-shipped rt_tables file (iproute2 >= 6.5.0). This does not change at runtime.
+IPROUTE2_DEFAULT_RT_TABLES_PATH = next(filter(os.path.exists, (
+    os.path.join(p_path, IPROUTE2_RT_TABLES_PATH) for p_path in IPROUTE2_DEFAULT_PATHS
+)), None)
+
+
 def get_iproute2_rt_tables_paths(type="read"):
     # In new versions, it reads from both /usr and /etc
     # and the /etc one overrides file in /usr
     # type read: read locations, package-shipped default and /etc
     # type write: write locations, to /etc only
-    rt_tables_path = "iproute2/rt_tables"
-    # iproute2 location order by version descending
-    defpaths = ["/usr/share", "/usr/lib", "/usr"]
-    local_full_path = "/etc/iproute2/rt_tables"
-
-    def isAbove650():
-        for p_path in defpaths:
-            f_p = os.path.join(p_path, rt_tables_path)
-            if os.path.exists(f_p):
-                return True, f_p
-        return False, None
-
-    if not os.path.exists(local_full_path):
+    if not os.path.exists(IPROUTE2_LOCAL_RT_TABLES_PATH):
         # create if not exist
-        os.makedirs(os.path.dirname(local_full_path), exist_ok=True)
-        with open(local_full_path, mode="a"):
+        os.makedirs(os.path.dirname(IPROUTE2_LOCAL_RT_TABLES_PATH), exist_ok=True)
+        with open(IPROUTE2_LOCAL_RT_TABLES_PATH, mode="a"):
             pass
     if type == "write":
-        return [local_full_path]
-    isNewVer, full_path = isAbove650()
-    if not isNewVer:
-        return [local_full_path]
-    return [full_path, local_full_path]
+        return [IPROUTE2_LOCAL_RT_TABLES_PATH]
+    if IPROUTE2_DEFAULT_RT_TABLES_PATH is None:
+        return [IPROUTE2_LOCAL_RT_TABLES_PATH]
+    return [IPROUTE2_DEFAULT_RT_TABLES_PATH, IPROUTE2_LOCAL_RT_TABLES_PATH]
+
+
+ADDRESS_TYPES = {
+    socket.AF_INET: ipaddress.IPv4Address,
+    socket.AF_INET6: ipaddress.IPv6Address,
+}
+
+
+@functools.cache
+def prefixlen_to_netmask(family, prefixlen):
+    if family == socket.AF_INET:
+        return ipaddress.IPv4Address((0xffffffff << (32 - prefixlen)) & 0xffffffff)
+
+    return ipaddress.IPv6Address(((1 << 128) - 1) ^ ((1 << (128 - prefixlen)) - 1))
+
+
+def to_ip_address(address):
+    # Avoid re-parsing values that are already address objects
+    if isinstance(address, (ipaddress.IPv4Address, ipaddress.IPv6Address)):
+        return address
+
+    return ipaddress.ip_address(address)
 
 
 class Route:
@@ -56,9 +76,9 @@ class Route:
         self, network, netmask, gateway=None, interface=None, flags=None,
         table_id=None, preferred_source=None, scope=None,
     ):
-        self.network = ipaddress.ip_address(network)
-        self.netmask = ipaddress.ip_address(netmask)
-        self.gateway = ipaddress.ip_address(gateway) if gateway else None
+        self.network = to_ip_address(network)
+        self.netmask = to_ip_address(netmask)
+        self.gateway = to_ip_address(gateway) if gateway else None
         self.interface = interface or None
         self.flags = flags or set()
         self.table_id = table_id
@@ -170,36 +190,58 @@ RTM_F_CLONED = 0x200
 
 
 class RoutingTable:
+    def __init__(self):
+        # ifindex <-> ifname mapping, populated on first use so that a single
+        # link dump serves all operations performed through this instance.
+        # Instances are meant to be used for a single sync pass; call refresh()
+        # before relying on interface names that may have changed since.
+        self._iface_cache = None
+
+    def refresh(self):
+        self._iface_cache = None
+
     @property
     def routes(self):
         return self.routes_internal()
 
-    def routes_internal(self, table_filter=None):
+    def routes_internal(self, table_filter=None, **route_filters):
+        # `route_filters` are passed through to pyroute2 (e.g. `family`, `dst_len`)
+        # so that non-matching routes are discarded before being parsed here.
         interfaces = self._interfaces()
 
         result = []
-        for r in ip.get_routes(table=table_filter):
+        for r in ip.get_routes(table=table_filter, **route_filters):
             if r["flags"] & RTM_F_CLONED:
                 continue
 
-            attrs = dict(r["attrs"])
-
-            if "RTA_DST" in attrs:
-                network = ipaddress.ip_address(attrs["RTA_DST"])
-                netmask = ipaddress.ip_network(f"{attrs['RTA_DST']}/{r['dst_len']}").netmask
+            # Extract only the attributes we need in a single pass
+            dst = gateway = oif = table_id = prefsrc = None
+            for key, value in r["attrs"]:
+                if key == "RTA_DST":
+                    dst = value
+                elif key == "RTA_GATEWAY":
+                    gateway = value
+                elif key == "RTA_OIF":
+                    oif = value
+                elif key == "RTA_TABLE":
+                    table_id = value
+                elif key == "RTA_PREFSRC":
+                    prefsrc = value
+
+            address_type = ADDRESS_TYPES[r["family"]]
+            if dst is not None:
+                network = address_type(dst)
+                netmask = prefixlen_to_netmask(r["family"], r["dst_len"])
             else:
-                network, netmask = {
-                    socket.AF_INET: (ipaddress.IPv4Address(0), ipaddress.IPv4Address(0)),
-                    socket.AF_INET6: (ipaddress.IPv6Address(0), ipaddress.IPv6Address(0)),
-                }[r["family"]]
+                network = netmask = address_type(0)
 
             result.append(Route(
                 network,
                 netmask,
-                ipaddress.ip_address(attrs["RTA_GATEWAY"]) if "RTA_GATEWAY" in attrs else None,
-                interfaces[attrs["RTA_OIF"]] if "RTA_OIF" in attrs and attrs["RTA_OIF"] in interfaces else None,
-                table_id=attrs["RTA_TABLE"],
-                preferred_source=attrs.get("RTA_PREFSRC"),
+                address_type(gateway) if gateway is not None else None,
+                interfaces.get(oif),
+                table_id=table_id,
+                preferred_source=prefsrc,
                 scope=r["scope"],
             ))
 
@@ -207,51 +249,33 @@ class RoutingTable:
 
     @property
     def routing_tables(self):
-        iproute2_rt_tables_paths = get_iproute2_rt_tables_paths(type="read")
-        content = []
-        for full_p in iproute2_rt_tables_paths:
+        # table id -> name. Later entries override earlier ones (the /etc file is read last)
+        # and are moved to the end so that ordering matches their last occurrence.
+        tables = {}
+        for full_p in get_iproute2_rt_tables_paths(type="read"):
             with open(full_p, "r") as f:
-                content.extend(f.readlines())
+                for line in f:
+                    if line.startswith("#") or len(parts := line.split()) < 2 or not parts[0].isdigit():
+                        continue
 
-        content = list(
-            filter(
-                lambda v: v.strip()
-                and not v.startswith("#")
-                and v.split()[0].strip().isdigit(),
-                content
-            )
-        )
-        if len(content) == 0:
-            return {}
-
-        mapping = list(
-            map(
-                lambda v: {
-                    "id": int(v.split()[0].strip()),
-                    "name": v.split()[1].strip(),
-                },
-                content
-            )
-        )
-        deduped = [
-            ii
-            for idx, ii in enumerate(mapping)
-            if ii["id"] not in map(lambda v: v["id"], mapping[idx+1:])
-        ]
+                    table_id = int(parts[0])
+                    tables.pop(table_id, None)
+                    tables[table_id] = parts[1]
+
+        return {name: RouteTable(table_id, name) for table_id, name in tables.items()}
 
-        return {t["name"]: RouteTable(t["id"], t["name"]) for t in deduped}
+    def _default_route(self, family):
+        for r in self.routes_internal(DEFAULT_TABLE_ID, family=family, dst_len=0):
+            if int(r.network) == 0 and int(r.netmask) == 0:
+                return r
 
     @property
     def default_route_ipv4(self):
-        f = list(filter(lambda r: int(r.network) == 0 and int(r.netmask) == 0 and r.af == AddressFamily.INET,
-                        self.routes_internal(DEFAULT_TABLE_ID)))
-        return f[0] if len(f) > 0 else None
+        return self._default_route(AddressFamily.INET)
 
     @property
     def default_route_ipv6(self):
-        f = list(filter(lambda r: int(r.network) == 0 and int(r.netmask) == 0 and r.af == AddressFamily.INET6,
-                        self.routes_internal(DEFAULT_TABLE_ID)))
-        return f[0] if len(f) > 0 else None
+        return self._default_route(AddressFamily.INET6)
 
     def add(self, route):
         self._op("add", route)
@@ -263,7 +287,12 @@ class RoutingTable:
         self._op("delete", route)
 
     def _interfaces(self):
-        return bidict.bidict({i["index"]: dict(i["attrs"]).get("IFLA_IFNAME") for i in self._ip_links()})
+        if self._iface_cache is None:
+            self._iface_cache = bidict.bidict({
+                i["index"]: dict(i["attrs"]).get("IFLA_IFNAME") for i in self._ip_links()
+            })
+
+        return self._iface_cache
 
     def _ip_links(self):
         retries = 5
@@ -20,6 +20,7 @@ from middlewared.utils.directoryservices.krb5_constants import (
     KRB_LibDefaults,
     KRB_ETYPE,
     KRB_TKT_CHECK_INTERVAL,
+    KRB_TKT_EXPIRY_SKEW,
 )
 from middlewared.utils.directoryservices.krb5 import (
     gss_get_current_cred,
@@ -51,6 +52,14 @@ class KerberosService(ConfigService):
         cli_namespace = "directory_service.kerberos.settings"
         role_prefix = 'DIRECTORY_SERVICE'
 
+    # monotonic deadline after which the TGT in the system ccache must be
+    # re-inspected. Populated on successful kinit / ticket check and cleared
+    # on kdestroy.
+    tgt_expiry = None
+    # (st_ino, st_mtime_ns) of the system ccache when tgt_expiry was recorded.
+    # Used to detect the ccache being removed or rewritten outside of middleware.
+    tgt_ccache_id = None
+
     @accepts(Dict(
         'kerberos_settings_update',
         Str('appdefaults_aux', max_length=None),
@@ -149,8 +158,13 @@ class KerberosService(ConfigService):
         ccache_path = krb_ccache.value
         if krb_ccache is krb5ccache.USER:
             ccache_path += str(data['ccache_uid'])
+        elif krb_ccache is krb5ccache.SYSTEM and self.system_ticket_is_fresh():
+            return True
+
+        if cred := gss_get_current_cred(ccache_path, False):
+            if krb_ccache is krb5ccache.SYSTEM:
+                self.update_tgt_expiry(cred)
 
-        if gss_get_current_cred(ccache_path, False):
             return True
 
         if raise_error:
@@ -158,6 +172,48 @@ class KerberosService(ConfigService):
 
         return False
 
+    @private
+    def system_ticket_is_fresh(self):
+        """
+        Returns True if the TGT in the system ccache was last seen valid and is
+        not within KRB_TKT_EXPIRY_SKEW seconds of expiring. This lets us skip
+        repeatedly inspecting the ccache during directory service operations.
+        The cached expiry is only trusted while the ccache file is unchanged.
+        """
+        if self.tgt_expiry is None:
+            return False
+
+        if time.monotonic() >= self.tgt_expiry - KRB_TKT_EXPIRY_SKEW:
+            return False
+
+        return self._system_ccache_id() == self.tgt_ccache_id
+
+    @private
+    def _system_ccache_id(self):
+        try:
+            st = os.stat(krb5ccache.SYSTEM.value)
+        except FileNotFoundError:
+            return None
+
+        return (st.st_ino, st.st_mtime_ns)
+
+    @private
+    def update_tgt_expiry(self, cred=None):
+        if cred is None:
+            cred = gss_get_current_cred(krb5ccache.SYSTEM.value, False)
+
+        if cred is None:
+            self.clear_tgt_expiry()
+            return
+
+        KerberosService.tgt_expiry = time.monotonic() + cred.lifetime
+        KerberosService.tgt_ccache_id = self._system_ccache_id()
+
+    @private
+    def clear_tgt_expiry(self):
+        KerberosService.tgt_expiry = None
+        KerberosService.tgt_ccache_id = None
+
     @private
     async def _validate_param_type(self, data):
         supported_validation_types = [
@@ -434,6 +490,9 @@ class KerberosService(ConfigService):
             if ccache == krb5ccache.USER:
                 os.chown(ccache_path, ccache_uid, -1)
 
+        if ccache == krb5ccache.SYSTEM:
+            self.update_tgt_expiry()
+
     @private
     async def _kinit(self):
         """
@@ -492,6 +551,9 @@ class KerberosService(ConfigService):
     @private
     @accepts(Ref('kerberos-options'))
     async def kdestroy(self, data):
+        if krb5ccache[data['ccache']] is krb5ccache.SYSTEM:
+            self.clear_tgt_expiry()
+
         kdestroy = await run(['kdestroy', '-c', krb5ccache[data['ccache']].value], check=False)
         if kdestroy.returncode != 0:
             raise CallError(f'kdestroy failed with error: {kdestroy.stderr.decode()}')
@@ -386,7 +386,7 @@ class LDAPService(ConfigService):
     async def hostnames_to_uris(self, data):
         ret = []
         for h in data['hostname']:
-            proto = 'ldaps' if SSL(data['ssl']) == SSL.USESSL else 'ldap'
+            proto = 'ldaps' if data['ssl'] == SSL.USESSL else 'ldap'
             parsed = urlparse(f"{proto}://{h}")
             try:
                 port = parsed.port
@@ -399,7 +399,7 @@ class LDAPService(ConfigService):
                 host, port = h.rsplit(':', 1)
 
             if port is None:
-                port = 636 if SSL(data['ssl']) == SSL.USESSL else 389
+                port = 636 if data['ssl'] == SSL.USESSL else 389
 
             uri = f"{proto}://{host}:{port}"
             ret.append(uri)
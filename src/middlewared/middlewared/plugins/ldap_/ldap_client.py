@@ -27,7 +27,7 @@ class LDAPClient:
         pyldap.set_option(pyldap.OPT_REFERRALS, 0)
 
     def __setup_ssl(self, data):
-        if SSL(data['security']['ssl']) == SSL.NOSSL:
+        if data['security']['ssl'] == SSL.NOSSL:
             return
 
         cert = data['security']['client_certificate']
@@ -72,7 +72,7 @@ class LDAPClient:
         pyldap.set_option(pyldap.OPT_NETWORK_TIMEOUT, data['options']['dns_timeout'])
 
         self.__setup_ssl(data)
-        if SSL(data['security']['ssl']) == SSL.USESTARTTLS:
+        if data['security']['ssl'] == SSL.USESTARTTLS:
             try:
                 self._handle.start_tls_s()
 
@@ -1,3 +1,4 @@
+import asyncio
 import ipaddress
 import psutil
 import contextlib
@@ -39,6 +40,10 @@ class NetworkConfigurationService(ConfigService):
         datastore_extend = 'network.configuration.network_config_extend'
         cli_namespace = 'network.configuration'
 
+    # Serializes configuration updates so that conditional updates such as
+    # set_default_domain() do not race with other updates.
+    _update_lock = asyncio.Lock()
+
     ENTRY = Dict(
         'network_configuration_entry',
         Int('id', required=True),
@@ -218,6 +223,22 @@ class NetworkConfigurationService(ConfigService):
 
             await self.middleware.call(f'service.{verb}', service_name)
 
+    @private
+    @accepts(Str('domain', validators=[Match(r'^[a-zA-Z\.\-\0-9]*$')]))
+    async def set_default_domain(self, domain):
+        """
+        Set `domain` as the system domain name unless one has already been configured
+        (i.e. it is empty or still the default value of "local").
+        Returns whether the domain name was changed.
+        """
+        async with self._update_lock:
+            current = (await self.config())['domain']
+            if current and current != 'local':
+                return False
+
+            await self.__update({'domain': domain})
+            return True
+
     @accepts(
         Patch(
             'network_configuration_entry', 'global_configuration_update',
@@ -247,6 +268,10 @@ class NetworkConfigurationService(ConfigService):
         `mdns` enables multicast DNS service announcements for enabled services. `wsd` enables Web Service
         Discovery support.
         """
+        async with self._update_lock:
+            return await self.__update(data)
+
+    async def __update(self, data):
         config = await self.config()
         config.pop('state')
 
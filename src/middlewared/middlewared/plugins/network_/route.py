@@ -114,6 +114,8 @@ class RouteService(Service):
             self.logger.info('Removing IPv4 default route')
             routing_table.delete(routing_table.default_route_ipv4)
 
+        # interfaces may have changed while IPv4 default route was being configured
+        routing_table.refresh()
         ipv6_gateway = config['gc_ipv6gateway'] or None
         if ipv6_gateway:
             if ipv6_gateway.count("%") == 1:
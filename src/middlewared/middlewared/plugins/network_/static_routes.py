@@ -104,6 +104,8 @@ class StaticRouteService(CRUDService):
                 except Exception as e:
                     self.logger.warning('Failed to remove route: %r', e)
 
+        # interfaces may have been renamed or recreated since routes were read
+        rt.refresh()
         for route in new_routes:
             self.logger.debug('Adding route %r', route.asdict())
             try:
@@ -1,3 +1,5 @@
+from middlewared.plugins.idmap_.idmap_sss import SSSClient
+
 from .base import SimpleService
 
 
@@ -5,3 +7,12 @@ class SSSDService(SimpleService):
     name = "sssd"
 
     systemd_unit = "sssd"
+
+    async def after_start(self):
+        SSSClient.invalidate_cache()
+
+    async def after_stop(self):
+        SSSClient.invalidate_cache()
+
+    async def after_restart(self):
+        SSSClient.invalidate_cache()
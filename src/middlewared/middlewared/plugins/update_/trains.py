@@ -1,4 +1,5 @@
 import json
+import orjson
 
 from aiohttp import ClientResponseError, ClientSession, ClientTimeout
 
@@ -11,6 +12,9 @@ from .utils import can_update, scale_update_server, SCALE_MANIFEST_FILE
 class UpdateService(Service):
     opts = {'raise_for_status': True, 'trust_env': True, 'timeout': ClientTimeout(INTERNET_TIMEOUT)}
     update_srv = scale_update_server()
+    # Shared between fetches so that back-to-back requests to the update server
+    # (e.g. trains.json followed by manifest.json) reuse the same connection.
+    session = None
 
     @private
     @cache
@@ -20,12 +24,19 @@ class UpdateService(Service):
 
     @private
     async def fetch(self, url):
-        async with ClientSession(**self.opts) as client:
-            try:
-                async with client.get(url) as resp:
-                    return await resp.json()
-            except ClientResponseError as e:
-                raise CallError(f'Error while fetching update manifest: {e}')
+        if self.session is None or self.session.closed:
+            self.session = ClientSession(**self.opts)
+
+        try:
+            async with self.session.get(url) as resp:
+                return await resp.json(loads=orjson.loads)
+        except ClientResponseError as e:
+            raise CallError(f'Error while fetching update manifest: {e}')
+
+    @private
+    async def terminate(self):
+        if self.session is not None:
+            await self.session.close()
 
     @private
     async def get_scale_update(self, train, current_version):
@@ -66,4 +77,4 @@ class UpdateService(Service):
     @private
     async def check_train(self, train):
         old_vers = (await self.middleware.call("update.get_manifest_file"))["version"]
-        return await self.middleware.call("update.get_scale_update", train, old_vers)
+        return await self.get_scale_update(train, old_vers)
@@ -0,0 +1,57 @@
+import pytest
+from unittest.mock import AsyncMock, Mock
+
+from middlewared.plugins.activedirectory import ActiveDirectoryService, KRB5_VALIDATION_ERRORS
+from middlewared.utils.directoryservices.krb5_error import KRB5ErrCode, KRB5Error
+
+BINDNAME = 'administrator'
+KEYTAB_CHOICES = ['AD_MACHINE_ACCOUNT', 'restricted']
+
+
+def ad_config(keytab):
+    return {
+        'bindname': BINDNAME,
+        'kerberos_principal': 'TESTSERVER$@AD.EXAMPLE' if keytab else '',
+    }
+
+
+def krb5_error(code):
+    return KRB5Error(gss_major=0, gss_minor=code, errmsg='canary')
+
+
+def ad_service():
+    svc = Mock()
+    svc.middleware.call = AsyncMock(return_value=KEYTAB_CHOICES)
+    return svc
+
+
+@pytest.mark.parametrize('code,keytab', list(KRB5_VALIDATION_ERRORS))
+@pytest.mark.asyncio
+async def test__krb5_error_to_validation_error(code, keytab):
+    key, msg = KRB5_VALIDATION_ERRORS[(code, keytab)]
+    err = await ActiveDirectoryService.krb5_error_to_validation_error(
+        ad_service(), ad_config(keytab), krb5_error(code)
+    )
+
+    assert err.attribute == f'activedirectory.{key}'
+    if code == KRB5ErrCode.KRB5_CC_NOTFOUND:
+        assert err.errmsg == msg.format(choices=', '.join(KEYTAB_CHOICES))
+    else:
+        assert err.errmsg == msg.format(bindname=BINDNAME)
+
+
+@pytest.mark.parametrize('keytab,attribute', [
+    (True, 'activedirectory.kerberos_principal'),
+    (False, 'activedirectory.bindpw'),
+])
+@pytest.mark.asyncio
+async def test__krb5_error_to_validation_error_catchall(keytab, attribute):
+    error = krb5_error(KRB5ErrCode.KRB5KDC_ERR_BADOPTION)
+    assert (error.krb5_code, keytab) not in KRB5_VALIDATION_ERRORS
+
+    err = await ActiveDirectoryService.krb5_error_to_validation_error(
+        ad_service(), ad_config(keytab), error
+    )
+
+    assert err.attribute == attribute
+    assert err.errmsg == str(error)
@@ -113,6 +113,7 @@ def active_directory(
     with override_nameservers(nameserver):
         try:
             config = call('activedirectory.update', payload, job=True)
+            call('core.job_wait', config['job_id'], job=True)
         except Exception:
             clear_ad_info()
             # we may be testing ValidationErrors
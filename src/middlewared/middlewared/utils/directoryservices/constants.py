@@ -1,43 +1,52 @@
 import enum
+import functools
 
 
-class DSStatus(enum.Enum):
-    DISABLED = enum.auto()
-    FAULTED = enum.auto()
-    LEAVING = enum.auto()
-    JOINING = enum.auto()
-    HEALTHY = enum.auto()
+class DSStatus(enum.IntEnum):
+    DISABLED = 0
+    FAULTED = 1
+    LEAVING = 2
+    JOINING = 3
+    HEALTHY = 4
 
 
-class DSType(enum.Enum):
+class DSType(enum.StrEnum):
     AD = 'ACTIVEDIRECTORY'
     IPA = 'IPA'
     LDAP = 'LDAP'
 
+    @classmethod
+    def from_wire(cls, value):
+        return DSTYPE_BY_VALUE[value]
 
-class SASL_Wrapping(enum.Enum):
+
+DSTYPE_BY_VALUE = {ds_type.value: ds_type for ds_type in DSType}
+
+
+class SASL_Wrapping(enum.StrEnum):
     PLAIN = 'PLAIN'
     SIGN = 'SIGN'
     SEAL = 'SEAL'
 
 
-class SSL(enum.Enum):
+class SSL(enum.StrEnum):
     NOSSL = 'OFF'
     USESSL = 'ON'
     USESTARTTLS = 'START_TLS'
 
 
 class NSS_Info(enum.Enum):
-    SFU = ('SFU', (DSType.AD,))
-    SFU20 = ('SFU20', (DSType.AD,))
-    RFC2307 = ('RFC2307', (DSType.AD, DSType.LDAP))
-    RFC2307BIS = ('RFC2307BIS', (DSType.LDAP, DSType.IPA))
-    TEMPLATE = ('TEMPLATE', (DSType.AD,))
-
-    @property
-    def nss_type(self):
-        return self.value[0]
-
-    @property
-    def valid_services(self):
-        return self.value[1]
+    SFU = ('SFU', frozenset({DSType.AD}))
+    SFU20 = ('SFU20', frozenset({DSType.AD}))
+    RFC2307 = ('RFC2307', frozenset({DSType.AD, DSType.LDAP}))
+    RFC2307BIS = ('RFC2307BIS', frozenset({DSType.LDAP, DSType.IPA}))
+    TEMPLATE = ('TEMPLATE', frozenset({DSType.AD}))
+
+    def __init__(self, nss_type, valid_services):
+        self.nss_type = nss_type
+        self.valid_services = valid_services
+
+
+@functools.cache
+def nss_types_for_dstype(ds_type):
+    return tuple(x.nss_type for x in NSS_Info if ds_type in x.valid_services)
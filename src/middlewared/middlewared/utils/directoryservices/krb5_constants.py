@@ -4,6 +4,7 @@ from middlewared.utils import MIDDLEWARE_RUN_DIR
 
 
 KRB_TKT_CHECK_INTERVAL = 1800
+KRB_TKT_EXPIRY_SKEW = 300
 
 
 class KRB_Keytab(enum.Enum):
@@ -101,6 +101,10 @@ def stop_activedirectory(request):
         job_status = wait_on_job(job_id, 180)
         assert job_status['state'] == 'SUCCESS', str(job_status['results'])
 
+        # domain join is performed in a separate activedirectory.start job
+        job_status = wait_on_job(job_status['results']['result']['job_id'], 180)
+        assert job_status['state'] == 'SUCCESS', str(job_status['results'])
+
 
 @pytest.fixture(scope="module")
 def do_ldap_connection(request):